@@ -1,11 +1,20 @@
 from flask import Flask, request, render_template, jsonify
 from flask_sqlalchemy import SQLAlchemy
+import sqlalchemy
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
 import csv
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 import io
+import time
+import re
+import math
+import uuid
+import random
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 
 # Create Flask app
 app = Flask(__name__, template_folder='../templates')
@@ -40,32 +49,84 @@ class CSVUpload(db.Model):
     upload_date = db.Column(db.DateTime, default=datetime.utcnow)
     total_rows = db.Column(db.Integer, nullable=False)
     status = db.Column(db.String(50), default='uploaded')
+    column_schema = db.Column(db.Text)  # JSON list of {"name", "type"}; NULL for legacy uploads
+    batch_id = db.Column(db.String(36), index=True)  # Set for files uploaded through /upload/batch
+    status_updated_at = db.Column(db.DateTime, default=datetime.utcnow)  # Detects stalled batches
+    # JSON {"head": [[row_number, row], ...], "sample": [...]}; deferred so the uploads list never loads it
+    preview_data = db.deferred(db.Column(db.Text))
     
-    def to_dict(self):
-        return {
+    # Supports keyset pagination of the uploads list, newest first
+    __table_args__ = (
+        db.Index('ix_csv_upload_upload_date_id', 'upload_date', 'id'),
+    )
+    
+    def get_schema(self):
+        """Return the upload's column schema, or None for uploads stored as JSON objects"""
+        if not self.column_schema:
+            return None
+        return json.loads(self.column_schema)
+    
+    def get_columns(self):
+        """Return the upload's column names in storage order, or None if it has no schema"""
+        schema = self.get_schema()
+        return [column['name'] for column in schema] if schema else None
+    
+    def to_dict(self, include_schema=False):
+        """Serialize the upload; lists stay summary-only, row views pass include_schema"""
+        upload = {
             'id': self.id,
             'filename': self.filename,
             'upload_date': self.upload_date.isoformat(),
             'total_rows': self.total_rows,
-            'status': self.status
+            'status': self.status,
+            'batch_id': self.batch_id
         }
+        if include_schema:
+            upload['schema'] = self.get_schema()
+        return upload
 
 class CSVData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     upload_id = db.Column(db.Integer, db.ForeignKey('csv_upload.id'), nullable=False)
-    row_data = db.Column(db.Text, nullable=False)  # JSON string of the row data
+    row_data = db.Column(db.Text, nullable=False)  # JSON array of values ordered by the upload schema (JSON object for legacy rows)
     row_number = db.Column(db.Integer, nullable=False)
     
     upload = db.relationship('CSVUpload', backref=db.backref('data_rows', lazy=True))
     
-    def to_dict(self):
+    # Supports paging an upload's rows in order
+    __table_args__ = (
+        db.Index('ix_csv_data_upload_id_row_number', 'upload_id', 'row_number'),
+    )
+    
+    def to_dict(self, columns=None):
+        """Serialize the row; pass the upload's columns to avoid a per-row schema lookup"""
+        row_data = json.loads(self.row_data)
+        if isinstance(row_data, list):
+            if columns is None:
+                columns = self.upload.get_columns() or []
+            row_data = dict(zip(columns, row_data))
+        
         return {
             'id': self.id,
             'upload_id': self.upload_id,
-            'row_data': json.loads(self.row_data),
+            'row_data': row_data,
             'row_number': self.row_number
         }
 
+def add_missing_columns():
+    """Add nullable model columns that are missing from existing tables"""
+    inspector = sqlalchemy.inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            with db.engine.begin() as connection:
+                connection.execute(db.text(
+                    f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                ))
+
 # Database initialization flag
 _db_initialized = False
 
@@ -75,10 +136,186 @@ def ensure_db_initialized():
     if not _db_initialized:
         try:
             db.create_all()
+            # create_all() skips existing tables, so add newer columns and indexes explicitly
+            add_missing_columns()
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(bind=db.engine, checkfirst=True)
             _db_initialized = True
         except Exception as e:
             print(f"Database initialization error: {e}")
 
+# Column types supported by the typed row encoding
+COLUMN_TYPES = ('string', 'integer', 'float', 'boolean', 'datetime')
+# Accepted in columns given the boolean type by a schema override
+TRUE_VALUES = {'true', 't', 'yes', 'y', '1'}
+FALSE_VALUES = {'false', 'f', 'no', 'n', '0'}
+# Inference only picks boolean for these, so Y/N or t/f text is never rewritten
+INFERRED_BOOLEAN_VALUES = {'true', 'false'}
+# Cells stored as null in non-string columns
+NULL_VALUES = {'', 'nan', 'null', 'none'}
+# Strict numeric text: no underscores, whitespace, inf or nan, unlike int()/float()
+INTEGER_PATTERN = re.compile(r'[+-]?\d+')
+FLOAT_PATTERN = re.compile(r'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?')
+# Numbers with leading zeros (zip codes, IDs) must stay strings to keep the zeros
+LEADING_ZERO_PATTERN = re.compile(r'[+-]?0\d')
+
+def is_float_text(value):
+    """Whether a cell is a finite number in strict decimal or exponent notation"""
+    return bool(FLOAT_PATTERN.fullmatch(value)) and math.isfinite(float(value))
+
+def is_datetime_text(value):
+    """Whether a cell is an ISO 8601 date or datetime"""
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+def coerce_value(value, column_type):
+    """Convert a CSV cell to the JSON value stored for its column type"""
+    if value is None or column_type == 'string':
+        return value
+    value = value.strip()
+    if value.lower() in NULL_VALUES:
+        return None
+    
+    if column_type == 'integer':
+        if not INTEGER_PATTERN.fullmatch(value):
+            raise ValueError(f"'{value}' is not an integer")
+        return int(value)
+    if column_type == 'float':
+        if not FLOAT_PATTERN.fullmatch(value):
+            raise ValueError(f"'{value}' is not a number")
+        number = float(value)
+        # e.g. 1e999; JSON has no Infinity
+        if not math.isfinite(number):
+            raise ValueError(f"'{value}' is out of range")
+        return number
+    if column_type == 'boolean':
+        lowered = value.lower()
+        if lowered in TRUE_VALUES:
+            return True
+        if lowered in FALSE_VALUES:
+            return False
+        raise ValueError(f"'{value}' is not a boolean")
+    if column_type == 'datetime':
+        # Validate, but keep the original text: '2024-01-01' must not become '2024-01-01T00:00:00'
+        if not is_datetime_text(value):
+            raise ValueError(f"'{value}' is not an ISO date or datetime")
+        return value
+    return value
+
+def infer_column_type(values):
+    """Infer the narrowest column type that stores every non-empty cell without loss
+
+    Uses the same rules as csv_ingest.infer_column_type() in app.py.
+    """
+    present = [value.strip() for value in values
+               if isinstance(value, str) and value.strip().lower() not in NULL_VALUES]
+    if not present or any(LEADING_ZERO_PATTERN.match(value) for value in present):
+        return 'string'
+    if all(INTEGER_PATTERN.fullmatch(value) for value in present):
+        return 'integer'
+    if all(is_float_text(value) for value in present):
+        return 'float'
+    if all(value.lower() in INFERRED_BOOLEAN_VALUES for value in present):
+        return 'boolean'
+    if all(is_datetime_text(value) for value in present):
+        return 'datetime'
+    return 'string'
+
+def infer_schema(fieldnames, rows, overrides=None):
+    """Build the upload schema from parsed CSV rows, applying user type overrides"""
+    overrides = overrides or {}
+    unknown = set(overrides) - set(fieldnames)
+    if unknown:
+        raise ValueError(f"Schema override for unknown column(s): {', '.join(sorted(unknown))}")
+    
+    schema = []
+    for name in fieldnames:
+        column_type = overrides.get(name) or infer_column_type([row.get(name) for row in rows])
+        if column_type not in COLUMN_TYPES:
+            raise ValueError(f"Unsupported type '{column_type}' for column '{name}'")
+        schema.append({'name': name, 'type': column_type})
+    return schema
+
+def parse_schema_overrides(raw):
+    """Parse the optional 'schema' form field: a JSON object of column name to type"""
+    if not raw:
+        return {}
+    overrides = json.loads(raw)
+    if not isinstance(overrides, dict):
+        raise ValueError('Schema overrides must be a JSON object of column name to type')
+    return overrides
+
+def encode_row(row, schema):
+    """Encode one CSV row as a compact JSON array ordered by the schema"""
+    encoded = []
+    for column in schema:
+        try:
+            encoded.append(coerce_value(row.get(column['name']), column['type']))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Column '{column['name']}': {e}") from e
+    return json.dumps(encoded, separators=(',', ':'))
+
+# Upload previews, captured during ingestion
+PREVIEW_HEAD_ROWS = int(os.environ.get('PREVIEW_HEAD_ROWS', '20'))
+PREVIEW_SAMPLE_ROWS = int(os.environ.get('PREVIEW_SAMPLE_ROWS', '100'))
+
+class PreviewSampler:
+    """Keep the first rows of an upload plus a uniform reservoir sample of all rows"""
+    
+    def __init__(self, head_size=PREVIEW_HEAD_ROWS, sample_size=PREVIEW_SAMPLE_ROWS):
+        self.head_size = head_size
+        self.sample_size = sample_size
+        self.head = []
+        self.sample = []
+        self.seen = 0
+        self.rng = random.Random()
+    
+    def add(self, row_number, encoded_row):
+        """Offer one encoded row; rows must be added in order"""
+        self.seen += 1
+        if len(self.head) < self.head_size:
+            self.head.append((row_number, encoded_row))
+        
+        # Algorithm R: every row seen so far stays in the sample with equal probability
+        if len(self.sample) < self.sample_size:
+            self.sample.append((row_number, encoded_row))
+        else:
+            slot = self.rng.randrange(self.seen)
+            if slot < self.sample_size:
+                self.sample[slot] = (row_number, encoded_row)
+    
+    def to_json(self):
+        """Serialize the preview for CSVUpload.preview_data"""
+        return json.dumps({
+            'head': [[row_number, json.loads(row)] for row_number, row in self.head],
+            'sample': [[row_number, json.loads(row)] for row_number, row in sorted(self.sample)]
+        }, separators=(',', ':'))
+
+def encode_csv_rows(rows, schema):
+    """Encode every parsed CSV row; returns (encoded rows, preview JSON)"""
+    sampler = PreviewSampler()
+    encoded_rows = []
+    for index, row in enumerate(rows):
+        encoded = encode_row(row, schema)
+        encoded_rows.append(encoded)
+        sampler.add(index + 1, encoded)
+    return encoded_rows, sampler.to_json()
+
+# Rows per bulk INSERT statement
+INSERT_CHUNK_SIZE = 5000
+
+def insert_csv_rows(upload_id, encoded_rows):
+    """Bulk insert encoded rows for an upload within the current transaction"""
+    for chunk_start in range(0, len(encoded_rows), INSERT_CHUNK_SIZE):
+        db.session.execute(sqlalchemy.insert(CSVData), [
+            {'upload_id': upload_id, 'row_data': encoded, 'row_number': chunk_start + offset + 1}
+            for offset, encoded in enumerate(encoded_rows[chunk_start:chunk_start + INSERT_CHUNK_SIZE])
+        ])
+
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'csv'}
 
@@ -119,27 +356,29 @@ def upload_file():
                 if not rows:
                     return jsonify({'success': False, 'message': 'CSV file is empty or invalid'})
                 
+                schema = infer_schema(
+                    csv_reader.fieldnames, rows, parse_schema_overrides(request.form.get('schema'))
+                )
+                
                 # Create upload record
                 upload_record = CSVUpload(
                     filename=filename,
                     total_rows=len(rows),
-                    status='processing'
+                    status='processing',
+                    column_schema=json.dumps(schema)
                 )
                 db.session.add(upload_record)
                 db.session.commit()
                 
-                # Store each row in the database
-                for index, row in enumerate(rows):
-                    row_data = CSVData(
-                        upload_id=upload_record.id,
-                        row_data=json.dumps(row),
-                        row_number=index + 1
-                    )
-                    db.session.add(row_data)
+                # Store each row in the database as a typed positional array
+                encoded_rows, preview_data = encode_csv_rows(rows, schema)
+                insert_csv_rows(upload_record.id, encoded_rows)
+                upload_record.preview_data = preview_data
                 
                 # Update status to completed
                 upload_record.status = 'completed'
                 db.session.commit()
+                invalidate_upload_counts()
                 
                 return jsonify({
                     'success': True, 
@@ -149,10 +388,12 @@ def upload_file():
                 })
                 
             except Exception as e:
-                # Update status to failed
+                # Discard any rows added before the error, then mark the upload failed
+                db.session.rollback()
                 if 'upload_record' in locals():
                     upload_record.status = 'failed'
                     db.session.commit()
+                    invalidate_upload_counts()
                 
                 return jsonify({'success': False, 'message': f'Error processing CSV: {str(e)}'})
         
@@ -162,29 +403,351 @@ def upload_file():
     except Exception as e:
         return jsonify({'success': False, 'message': f'Upload failed: {str(e)}'})
 
+# Batch uploads
+# Serverless functions cannot run work after the response is sent, so batches
+# are ingested within the request: files are parsed and encoded concurrently,
+# then written through the request's single database session.
+BATCH_UPLOAD_WORKERS = int(os.environ.get('BATCH_UPLOAD_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# Limits on one batch: its request body, and everything unpacked from its zips
+BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', '1000'))
+BATCH_MAX_BYTES = int(os.environ.get('BATCH_MAX_BYTES', str(64 * 1024 * 1024)))
+
+# A batch cut off by the function timeout never finishes its remaining files;
+# a batch with unfinished files and no status change for this long is marked failed.
+BATCH_STALL_TIMEOUT = int(os.environ.get('BATCH_STALL_TIMEOUT', '900'))  # seconds
+UNFINISHED_STATUSES = ('queued', 'processing')
+
+def read_batch_files(files):
+    """Read uploaded CSVs, and the CSVs inside uploaded zips, into memory
+
+    Returns a list of (filename, content bytes) and a list of skipped file names.
+    Raises ValueError once the batch exceeds BATCH_MAX_FILES or BATCH_MAX_BYTES.
+    """
+    csv_files = []
+    skipped = []
+    total_bytes = 0
+    
+    def check_limits(size):
+        if len(csv_files) >= BATCH_MAX_FILES:
+            raise ValueError(f'Batch exceeds the limit of {BATCH_MAX_FILES} files')
+        if total_bytes + size > BATCH_MAX_BYTES:
+            raise ValueError(f'Batch exceeds the limit of {BATCH_MAX_BYTES} bytes')
+    
+    for file in files:
+        filename = secure_filename(file.filename or '')
+        if allowed_file(filename):
+            content = file.read()
+            check_limits(len(content))
+            total_bytes += len(content)
+            csv_files.append((filename, content))
+        elif filename.lower().endswith('.zip'):
+            try:
+                with zipfile.ZipFile(file.stream) as archive:
+                    for member in archive.infolist():
+                        member_name = secure_filename(os.path.basename(member.filename))
+                        if member.is_dir() or member.filename.startswith('__MACOSX/'):
+                            continue
+                        if allowed_file(member_name):
+                            # Check the declared size before extracting; reads stop at it
+                            check_limits(member.file_size)
+                            total_bytes += member.file_size
+                            csv_files.append((member_name, archive.read(member)))
+                        else:
+                            skipped.append(member.filename)
+            except zipfile.BadZipFile:
+                skipped.append(filename)
+        elif filename:
+            skipped.append(filename)
+    return csv_files, skipped
+
+def parse_batch_file(file_content, schema_overrides):
+    """Parse one CSV and encode its rows; returns (schema, encoded rows, preview JSON)"""
+    csv_reader = csv.DictReader(io.StringIO(file_content.decode('utf-8')))
+    rows = list(csv_reader)
+    if not rows:
+        raise ValueError('CSV file is empty or invalid')
+    schema = infer_schema(csv_reader.fieldnames, rows, schema_overrides)
+    encoded_rows, preview_data = encode_csv_rows(rows, schema)
+    return schema, encoded_rows, preview_data
+
+def set_batch_file_status(upload_id, status, **values):
+    """Move a batch file to status, with any other column values, if it is still unfinished
+
+    A conditional UPDATE, so a file fail_stalled_batches() has already marked
+    failed is never switched back. Returns False if the file was left alone.
+    """
+    updated = CSVUpload.query.filter(
+        CSVUpload.id == upload_id, CSVUpload.status.in_(UNFINISHED_STATUSES)
+    ).update({'status': status, 'status_updated_at': datetime.utcnow(), **values},
+             synchronize_session=False)
+    return updated == 1
+
+def fail_stalled_batches(batch_id):
+    """Mark a batch's unfinished files failed if it has made no progress for BATCH_STALL_TIMEOUT
+
+    Returns the number of files marked failed.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=BATCH_STALL_TIMEOUT)
+    last_change = db.session.query(
+        db.func.max(db.func.coalesce(CSVUpload.status_updated_at, CSVUpload.upload_date))
+    ).filter(CSVUpload.batch_id == batch_id).scalar()
+    if last_change is None or last_change >= cutoff:
+        return 0
+    
+    failed = CSVUpload.query.filter(
+        CSVUpload.batch_id == batch_id, CSVUpload.status.in_(UNFINISHED_STATUSES)
+    ).update({'status': 'failed', 'status_updated_at': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    if failed:
+        invalidate_upload_counts()
+    return failed
+
+def batch_report(batch_id):
+    """Aggregate the status of every upload in a batch"""
+    fail_stalled_batches(batch_id)
+    uploads = CSVUpload.query.filter_by(batch_id=batch_id).order_by(CSVUpload.id).all()
+    counts = {}
+    for upload in uploads:
+        counts[upload.status] = counts.get(upload.status, 0) + 1
+    finished = counts.get('completed', 0) + counts.get('failed', 0)
+    
+    return {
+        'batch_id': batch_id,
+        'total_files': len(uploads),
+        'finished_files': finished,
+        'status_counts': counts,
+        'total_rows': sum(upload.total_rows for upload in uploads),
+        'done': finished == len(uploads),
+        'uploads': [upload.to_dict() for upload in uploads]
+    }
+
+@app.route('/upload/batch', methods=['POST'])
+def upload_batch():
+    """Accept many CSV files (or zips of CSVs) and ingest them concurrently"""
+    ensure_db_initialized()
+    # The whole batch is bounded by BATCH_MAX_BYTES, not the single-file MAX_CONTENT_LENGTH
+    request.max_content_length = BATCH_MAX_BYTES
+    request.max_form_parts = BATCH_MAX_FILES + 10
+    try:
+        files = request.files.getlist('files')
+        if not files:
+            return jsonify({'success': False, 'message': 'No files selected'})
+        
+        try:
+            schema_overrides = parse_schema_overrides(request.form.get('schema'))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': f'Invalid schema: {str(e)}'})
+        
+        try:
+            csv_files, skipped = read_batch_files(files)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        if not csv_files:
+            return jsonify({'success': False, 'message': 'No CSV files found in upload', 'skipped': skipped})
+        
+        batch_id = uuid.uuid4().hex
+        upload_records = [
+            CSVUpload(filename=filename, total_rows=0, status='queued', batch_id=batch_id)
+            for filename, _ in csv_files
+        ]
+        db.session.add_all(upload_records)
+        db.session.commit()
+        invalidate_upload_counts()
+        upload_ids = [upload_record.id for upload_record in upload_records]
+        
+        with ThreadPoolExecutor(max_workers=BATCH_UPLOAD_WORKERS) as executor:
+            futures = [
+                executor.submit(parse_batch_file, content, schema_overrides)
+                for _, content in csv_files
+            ]
+            
+            errors = {}
+            for upload_id, (filename, _), future in zip(upload_ids, csv_files, futures):
+                try:
+                    schema, encoded_rows, preview_data = future.result()
+                    insert_csv_rows(upload_id, encoded_rows)
+                    if not set_batch_file_status(
+                        upload_id, 'completed', total_rows=len(encoded_rows),
+                        column_schema=json.dumps(schema), preview_data=preview_data
+                    ):
+                        db.session.rollback()
+                        errors[filename] = 'Marked failed as stalled before it was written'
+                        continue
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    set_batch_file_status(upload_id, 'failed')
+                    db.session.commit()
+                    errors[filename] = str(e)
+        
+        invalidate_upload_counts()
+        report = batch_report(batch_id)
+        return jsonify({
+            'success': True,
+            'message': f"Batch processed: {report['status_counts'].get('completed', 0)} of {len(csv_files)} files uploaded.",
+            'skipped': skipped,
+            'errors': errors,
+            **report
+        })
+    
+    except RequestEntityTooLarge:
+        return jsonify({
+            'success': False,
+            'message': f'Batch exceeds the limit of {BATCH_MAX_BYTES} bytes or {BATCH_MAX_FILES} files'
+        }), 413
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Batch upload failed: {str(e)}'})
+
+@app.route('/upload/batch/<batch_id>')
+def get_batch_status(batch_id):
+    ensure_db_initialized()
+    try:
+        report = batch_report(batch_id)
+        if report['total_files'] == 0:
+            return jsonify({'success': False, 'message': 'Batch not found'}), 404
+        return jsonify({'success': True, **report})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error fetching batch: {str(e)}'})
+
+# Uploads list pagination
+UPLOADS_PAGE_SIZE = 50
+UPLOADS_MAX_PAGE_SIZE = 200
+UPLOAD_COUNT_CACHE_TTL = int(os.environ.get('UPLOAD_COUNT_CACHE_TTL', '30'))  # seconds
+
+# Total upload counts keyed by status filter: {statuses: (count, cached_at)}
+_upload_count_cache = {}
+
+def invalidate_upload_counts():
+    """Drop cached upload counts after an upload is added or changes status"""
+    _upload_count_cache.clear()
+
+def count_uploads(statuses):
+    """Return the total number of uploads matching statuses, cached for a short TTL"""
+    key = tuple(sorted(statuses))
+    cached = _upload_count_cache.get(key)
+    now = time.monotonic()
+    if cached and now - cached[1] < UPLOAD_COUNT_CACHE_TTL:
+        return cached[0]
+    
+    query = db.session.query(db.func.count(CSVUpload.id))
+    if statuses:
+        query = query.filter(CSVUpload.status.in_(statuses))
+    total = query.scalar()
+    _upload_count_cache[key] = (total, now)
+    return total
+
+def encode_uploads_cursor(upload):
+    """Encode the keyset position of an upload as an opaque cursor"""
+    return f"{upload.upload_date.isoformat()}_{upload.id}"
+
+def decode_uploads_cursor(cursor):
+    """Decode a cursor from encode_uploads_cursor into (upload_date, id)"""
+    upload_date, upload_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(upload_date), int(upload_id)
+
 @app.route('/uploads')
 def get_uploads():
     ensure_db_initialized()
     try:
-        uploads = CSVUpload.query.order_by(CSVUpload.upload_date.desc()).all()
+        try:
+            limit = int(request.args.get('limit', UPLOADS_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Invalid limit'}), 400
+        limit = max(1, min(limit, UPLOADS_MAX_PAGE_SIZE))
+        
+        statuses = [s for s in request.args.get('status', '').split(',') if s]
+        
+        query = CSVUpload.query
+        if statuses:
+            query = query.filter(CSVUpload.status.in_(statuses))
+        
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                cursor_date, cursor_id = decode_uploads_cursor(cursor)
+            except ValueError:
+                return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+            # Rows strictly after the cursor in (upload_date desc, id desc) order
+            query = query.filter(db.or_(
+                CSVUpload.upload_date < cursor_date,
+                db.and_(CSVUpload.upload_date == cursor_date, CSVUpload.id < cursor_id)
+            ))
+        
+        # Fetch one extra row to know whether another page exists
+        uploads = query.order_by(
+            CSVUpload.upload_date.desc(), CSVUpload.id.desc()
+        ).limit(limit + 1).all()
+        has_more = len(uploads) > limit
+        uploads = uploads[:limit]
+        
         return jsonify({
             'success': True,
-            'uploads': [upload.to_dict() for upload in uploads]
+            'uploads': [upload.to_dict() for upload in uploads],
+            'total': count_uploads(statuses),
+            'next_cursor': encode_uploads_cursor(uploads[-1]) if has_more else None
         })
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error fetching uploads: {str(e)}'})
 
+# Maximum rows returned by one /upload/<id>/data page
+DATA_MAX_PAGE_SIZE = 1000
+
+@app.route('/upload/<int:upload_id>/preview')
+def get_upload_preview(upload_id):
+    """First rows plus a uniform random sample, stored at ingestion so this is one row read"""
+    ensure_db_initialized()
+    try:
+        upload = CSVUpload.query.get_or_404(upload_id)
+        columns = upload.get_columns()
+        
+        if upload.preview_data:
+            preview = json.loads(upload.preview_data)
+            head = [{'row_number': n, 'row_data': dict(zip(columns, row))} for n, row in preview['head']]
+            sample = [{'row_number': n, 'row_data': dict(zip(columns, row))} for n, row in preview['sample']]
+        else:
+            # Uploads from before previews were captured: fall back to the first rows
+            data_rows = CSVData.query.filter_by(upload_id=upload_id).order_by(
+                CSVData.row_number
+            ).limit(PREVIEW_HEAD_ROWS).all()
+            head = [row.to_dict(columns) for row in data_rows]
+            sample = []
+        
+        return jsonify({
+            'success': True,
+            'upload': upload.to_dict(include_schema=True),
+            'head': head,
+            'sample': sample
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error fetching preview: {str(e)}'})
+
 @app.route('/upload/<int:upload_id>/data')
 def get_upload_data(upload_id):
+    """Rows of an upload in order; pass limit (and after_row) to page through them"""
     ensure_db_initialized()
     try:
         upload = CSVUpload.query.get_or_404(upload_id)
-        data_rows = CSVData.query.filter_by(upload_id=upload_id).order_by(CSVData.row_number).all()
+        query = CSVData.query.filter_by(upload_id=upload_id)
+        
+        after_row = request.args.get('after_row', type=int)
+        if after_row:
+            query = query.filter(CSVData.row_number > after_row)
+        query = query.order_by(CSVData.row_number)
+        
+        limit = request.args.get('limit', type=int)
+        if limit:
+            limit = max(1, min(limit, DATA_MAX_PAGE_SIZE))
+            query = query.limit(limit)
+        
+        data_rows = query.all()
+        columns = upload.get_columns()
         
         return jsonify({
             'success': True,
-            'upload': upload.to_dict(),
-            'data': [row.to_dict() for row in data_rows]
+            'upload': upload.to_dict(include_schema=True),
+            'data': [row.to_dict(columns) for row in data_rows],
+            'next_after_row': data_rows[-1].row_number if limit and len(data_rows) == limit else None
         })
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error fetching data: {str(e)}'})
@@ -201,14 +764,50 @@ def debug_info():
         'routes': [str(rule) for rule in app.url_map.iter_rules()]
     })
 
-@app.route('/health')
-def health_check():
+# Cached health checks. Serverless functions cannot keep a background thread
+# alive between invocations, so results are refreshed lazily once they expire.
+HEALTH_CHECK_INTERVAL = int(os.environ.get('HEALTH_CHECK_INTERVAL', '30'))  # seconds
+
+_health_state = {'status': 'starting', 'database': None, 'checked_at': None}
+
+def run_health_checks():
+    """Probe the database and cache the result"""
     try:
-        # Test database connection
-        db.session.execute('SELECT 1')
-        return jsonify({'status': 'healthy', 'database': 'connected'})
+        with db.engine.connect() as connection:
+            connection.execute(db.text('SELECT 1'))
+        _health_state.update({'status': 'healthy', 'database': 'connected'})
+        _health_state.pop('error', None)
     except Exception as e:
-        return jsonify({'status': 'unhealthy', 'error': str(e)}), 500
+        _health_state.update({'status': 'unhealthy', 'database': 'error', 'error': str(e)})
+    _health_state['checked_at'] = time.time()
+
+def get_health_snapshot():
+    """Return the cached health results, refreshing them if they have expired"""
+    checked_at = _health_state['checked_at']
+    if checked_at is None or time.time() - checked_at >= HEALTH_CHECK_INTERVAL:
+        run_health_checks()
+    
+    snapshot = dict(_health_state)
+    snapshot['age_seconds'] = round(time.time() - snapshot['checked_at'], 1)
+    snapshot['checked_at'] = datetime.utcfromtimestamp(snapshot['checked_at']).isoformat()
+    return snapshot
+
+@app.route('/health')
+def health_check():
+    status = get_health_snapshot()
+    return jsonify(status), 500 if status['status'] == 'unhealthy' else 200
+
+@app.route('/health/live')
+def liveness_check():
+    """Liveness: the function is up and serving requests"""
+    return jsonify({'status': 'alive'}), 200
+
+@app.route('/health/ready')
+def readiness_check():
+    """Readiness: the last cached database check passed"""
+    status = get_health_snapshot()
+    status['ready'] = status['status'] == 'healthy'
+    return jsonify(status), 200 if status['ready'] else 503
 
 # For local development
 if __name__ == '__main__':
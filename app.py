@@ -1,18 +1,38 @@
 from flask import Flask, request, render_template, jsonify, redirect, url_for, flash
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
 import pandas as pd
+import sqlalchemy
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import json
 import csv
 import io
 import sys
+import time
+import glob
+import functools
+import threading
+import uuid
+import shutil
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from csv_ingest import (
+    PREVIEW_HEAD_ROWS, encode_csv_rows, infer_schema, parse_csv_file, parse_schema_overrides,
+    read_csv_text
+)
 
 # Load environment variables
 load_dotenv()
 
+# Batch parse workers are spawned processes; when the app runs as `python app.py`
+# they re-import this module as __mp_main__, but only need csv_ingest from it
+IS_BATCH_PARSE_WORKER = __name__ == '__mp_main__'
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'dev-key-change-in-production')
 
@@ -24,17 +44,19 @@ if DATABASE_URL:
         DATABASE_URL = DATABASE_URL.replace('postgres://', 'postgresql://')
     
     # Test if we can connect to the database
-    try:
-        import sqlalchemy
-        test_engine = sqlalchemy.create_engine(DATABASE_URL)
-        with test_engine.connect() as conn:
-            conn.execute(sqlalchemy.text('SELECT 1'))
+    if IS_BATCH_PARSE_WORKER:
         app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
-        print("✅ Connected to remote PostgreSQL database")
-    except Exception as e:
-        print(f"❌ Cannot connect to remote database: {e}")
-        print("🔄 Falling back to local SQLite database")
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///fallback_csv_data.db'
+    else:
+        try:
+            test_engine = sqlalchemy.create_engine(DATABASE_URL)
+            with test_engine.connect() as conn:
+                conn.execute(sqlalchemy.text('SELECT 1'))
+            app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
+            print("✅ Connected to remote PostgreSQL database")
+        except Exception as e:
+            print(f"❌ Cannot connect to remote database: {e}")
+            print("🔄 Falling back to local SQLite database")
+            app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///fallback_csv_data.db'
     
     # Add connection pool settings for better reliability
     app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
@@ -58,21 +80,46 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 # Initialize database
 db = SQLAlchemy(app)
 
+def add_missing_columns():
+    """Add nullable model columns that are missing from existing tables"""
+    inspector = sqlalchemy.inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            with db.engine.begin() as connection:
+                connection.execute(db.text(
+                    f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                ))
+            print(f"✅ Added column {table.name}.{column.name}")
+
+# Set once the tables, columns and indexes are known to exist
+_db_initialized = False
+
 # Database initialization function
 def init_database():
-    """Initialize database tables"""
+    """Initialize database tables; a no-op once it has succeeded"""
+    global _db_initialized
+    if _db_initialized:
+        return True
     try:
         with app.app_context():
             db.create_all()
+            # create_all() skips tables that already exist, so make sure
+            # columns and indexes added after the first deploy get created too
+            add_missing_columns()
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(bind=db.engine, checkfirst=True)
             print("✅ Database tables initialized successfully")
+            _db_initialized = True
             return True
     except Exception as e:
         print(f"❌ Error initializing database: {e}")
         return False
 
-# Initialize database on startup
-init_database()
-
 # Database Models
 class CSVUpload(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -80,31 +127,68 @@ class CSVUpload(db.Model):
     upload_date = db.Column(db.DateTime, default=datetime.utcnow)
     total_rows = db.Column(db.Integer, nullable=False)
     status = db.Column(db.String(50), default='uploaded')
+    column_schema = db.Column(db.Text)  # JSON list of {"name", "type"}; NULL for legacy uploads
+    batch_id = db.Column(db.String(36), index=True)  # Set for files uploaded through /upload/batch
+    status_updated_at = db.Column(db.DateTime, default=datetime.utcnow)  # Detects stalled batches
+    # JSON {"head": [[row_number, row], ...], "sample": [...]}; deferred so the uploads list never loads it
+    preview_data = db.deferred(db.Column(db.Text))
     
-    def to_dict(self):
-        return {
+    # Supports keyset pagination of the uploads list, newest first
+    __table_args__ = (
+        db.Index('ix_csv_upload_upload_date_id', 'upload_date', 'id'),
+    )
+    
+    def get_schema(self):
+        """Return the upload's column schema, or None for uploads stored as JSON objects"""
+        if not self.column_schema:
+            return None
+        return json.loads(self.column_schema)
+    
+    def get_columns(self):
+        """Return the upload's column names in storage order, or None if it has no schema"""
+        schema = self.get_schema()
+        return [column['name'] for column in schema] if schema else None
+    
+    def to_dict(self, include_schema=False):
+        """Serialize the upload; lists stay summary-only, row views pass include_schema"""
+        upload = {
             'id': self.id,
             'filename': self.filename,
             'upload_date': self.upload_date.isoformat(),
             'total_rows': self.total_rows,
-            'status': self.status
+            'status': self.status,
+            'batch_id': self.batch_id
         }
+        if include_schema:
+            upload['schema'] = self.get_schema()
+        return upload
 
 class CSVData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     upload_id = db.Column(db.Integer, db.ForeignKey('csv_upload.id'), nullable=False)
-    row_data = db.Column(db.Text, nullable=False)  # JSON string of the row data
+    row_data = db.Column(db.Text, nullable=False)  # JSON array of values ordered by the upload schema (JSON object for legacy rows)
     row_number = db.Column(db.Integer, nullable=False)
     
     upload = db.relationship('CSVUpload', backref=db.backref('data_rows', lazy=True))
     
-    def to_dict(self):
+    # Supports paging an upload's rows in order
+    __table_args__ = (
+        db.Index('ix_csv_data_upload_id_row_number', 'upload_id', 'row_number'),
+    )
+    
+    def to_dict(self, columns=None):
+        """Serialize the row; pass the upload's columns to avoid a per-row schema lookup"""
         try:
             row_data = json.loads(self.row_data)
         except json.JSONDecodeError as e:
             # If JSON parsing fails, return an error indicator
             row_data = {'error': f'Invalid JSON data: {str(e)}', 'raw_data': self.row_data[:100]}
         
+        if isinstance(row_data, list):
+            if columns is None:
+                columns = self.upload.get_columns() or []
+            row_data = dict(zip(columns, row_data))
+        
         return {
             'id': self.id,
             'upload_id': self.upload_id,
@@ -112,20 +196,20 @@ class CSVData(db.Model):
             'row_number': self.row_number
         }
 
-def clean_data_for_json(data):
-    """Clean data to make it JSON serializable"""
-    if isinstance(data, dict):
-        return {key: clean_data_for_json(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [clean_data_for_json(item) for item in data]
-    elif pd.isna(data):
-        return None
-    elif isinstance(data, (pd.Timestamp, datetime)):
-        return data.isoformat()
-    elif isinstance(data, (int, float)) and pd.isna(data):
-        return None
-    else:
-        return data
+# Initialize database on startup (after the models are registered)
+if not IS_BATCH_PARSE_WORKER:
+    init_database()
+
+# Rows per bulk INSERT statement
+INSERT_CHUNK_SIZE = 5000
+
+def insert_csv_rows(upload_id, encoded_rows):
+    """Bulk insert encoded rows for an upload within the current transaction"""
+    for chunk_start in range(0, len(encoded_rows), INSERT_CHUNK_SIZE):
+        db.session.execute(sqlalchemy.insert(CSVData), [
+            {'upload_id': upload_id, 'row_data': encoded, 'row_number': chunk_start + offset + 1}
+            for offset, encoded in enumerate(encoded_rows[chunk_start:chunk_start + INSERT_CHUNK_SIZE])
+        ])
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'csv'}
@@ -141,7 +225,7 @@ def index():
 def upload_file():
     upload_record = None
     try:
-        # Ensure database is initialized (redundant safety check)
+        # Retry initialization only if it failed at startup
         if not init_database():
             return jsonify({'success': False, 'message': 'Database initialization failed'})
         
@@ -159,7 +243,9 @@ def upload_file():
             
             # Parse CSV and store in database
             try:
-                df = pd.read_csv(filepath)
+                df = read_csv_text(filepath)
+                schema = infer_schema(df, parse_schema_overrides(request.form.get('schema')))
+                encoded_rows, preview_data = encode_csv_rows(df, schema)
                 
                 # Start a new transaction
                 try:
@@ -167,26 +253,20 @@ def upload_file():
                     upload_record = CSVUpload(
                         filename=filename,
                         total_rows=len(df),
-                        status='processing'
+                        status='processing',
+                        column_schema=json.dumps(schema)
                     )
                     db.session.add(upload_record)
                     db.session.flush()  # Get the ID without committing
                     
-                    # Store each row in the database
-                    for index, row in df.iterrows():
-                        # Convert row to dict and clean it for JSON
-                        row_dict = clean_data_for_json(row.to_dict())
-                        
-                        row_data = CSVData(
-                            upload_id=upload_record.id,
-                            row_data=json.dumps(row_dict),
-                            row_number=index + 1
-                        )
-                        db.session.add(row_data)
+                    # Store each row in the database as a typed positional array
+                    insert_csv_rows(upload_record.id, encoded_rows)
+                    upload_record.preview_data = preview_data
                     
                     # Update status to completed
                     upload_record.status = 'completed'
                     db.session.commit()
+                    invalidate_upload_counts()
                     
                     # Clean up uploaded file
                     if os.path.exists(filepath):
@@ -209,6 +289,7 @@ def upload_file():
                             upload_record.status = 'failed'
                             db.session.add(upload_record)
                             db.session.commit()
+                            invalidate_upload_counts()
                         except:
                             db.session.rollback()
                     
@@ -235,27 +316,437 @@ def upload_file():
             pass
         return jsonify({'success': False, 'message': f'Upload failed: {str(e)}'})
 
+# Batch uploads
+# Parsing and encoding are CPU bound pure Python, so they run in worker
+# processes. The encoded rows are then bulk inserted by a few writer threads,
+# each holding one database connection; keep that below the engine's pool
+# size to leave connections for regular requests.
+BATCH_PARSE_WORKERS = int(os.getenv('BATCH_PARSE_WORKERS', str(os.cpu_count() or 1)))
+BATCH_UPLOAD_WORKERS = int(os.getenv('BATCH_UPLOAD_WORKERS', str(min(4, os.cpu_count() or 1))))
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    # SQLite allows one writer at a time; more threads only hit "database is locked"
+    BATCH_UPLOAD_WORKERS = 1
+
+# Limits on one batch: its request body, and everything unpacked from its zips
+BATCH_MAX_FILES = int(os.getenv('BATCH_MAX_FILES', '1000'))
+BATCH_MAX_BYTES = int(os.getenv('BATCH_MAX_BYTES', str(512 * 1024 * 1024)))
+
+# Batch work lives in the worker process that accepted it, so a worker restart
+# (e.g. gunicorn --max-requests) orphans its files. A batch with unfinished
+# files and no status change for this long is marked failed.
+BATCH_STALL_TIMEOUT = int(os.getenv('BATCH_STALL_TIMEOUT', '900'))  # seconds
+UNFINISHED_STATUSES = ('queued', 'processing')
+
+_batch_parse_pool = None
+_batch_write_pool = None
+_batch_executor_pid = None
+_batch_executor_lock = threading.Lock()
+
+def get_batch_executors(replace_parse_pool=False):
+    """Return this worker process's (parse pool, write pool), creating them after fork"""
+    global _batch_parse_pool, _batch_write_pool, _batch_executor_pid
+    with _batch_executor_lock:
+        if _batch_executor_pid != os.getpid() or replace_parse_pool:
+            # spawn, not fork: this process already runs health and writer threads
+            _batch_parse_pool = ProcessPoolExecutor(
+                max_workers=BATCH_PARSE_WORKERS, mp_context=multiprocessing.get_context('spawn')
+            )
+        if _batch_executor_pid != os.getpid():
+            _batch_write_pool = ThreadPoolExecutor(
+                max_workers=BATCH_UPLOAD_WORKERS, thread_name_prefix='batch-upload'
+            )
+            _batch_executor_pid = os.getpid()
+        return _batch_parse_pool, _batch_write_pool
+
+def save_batch_files(files, batch_id):
+    """Save uploaded CSVs, and the CSVs inside uploaded zips, to the upload folder
+
+    Returns a list of (filename, filepath) and a list of skipped file names.
+    Raises ValueError once the batch exceeds BATCH_MAX_FILES or BATCH_MAX_BYTES.
+    """
+    saved = []
+    skipped = []
+    total_bytes = 0
+    
+    def save(filename, stream, size=None):
+        nonlocal total_bytes
+        if len(saved) >= BATCH_MAX_FILES:
+            raise ValueError(f'Batch exceeds the limit of {BATCH_MAX_FILES} files')
+        # Check the declared size first so oversized zip members are never extracted
+        if size is not None and total_bytes + size > BATCH_MAX_BYTES:
+            raise ValueError(f'Batch exceeds the limit of {BATCH_MAX_BYTES} bytes')
+        filepath = os.path.join(
+            app.config['UPLOAD_FOLDER'], f'{batch_id}_{len(saved)}_{filename}'
+        )
+        saved.append((filename, filepath))
+        with open(filepath, 'wb') as f:
+            shutil.copyfileobj(stream, f)
+        total_bytes += os.path.getsize(filepath)
+        if total_bytes > BATCH_MAX_BYTES:
+            raise ValueError(f'Batch exceeds the limit of {BATCH_MAX_BYTES} bytes')
+    
+    for file in files:
+        filename = secure_filename(file.filename or '')
+        if allowed_file(filename):
+            save(filename, file.stream)
+        elif filename.lower().endswith('.zip'):
+            try:
+                with zipfile.ZipFile(file.stream) as archive:
+                    for member in archive.infolist():
+                        member_name = secure_filename(os.path.basename(member.filename))
+                        if member.is_dir() or member.filename.startswith('__MACOSX/'):
+                            continue
+                        if allowed_file(member_name):
+                            # Reads stop at the declared file_size, so the check in save() holds
+                            with archive.open(member) as stream:
+                                save(member_name, stream, member.file_size)
+                        else:
+                            skipped.append(member.filename)
+            except zipfile.BadZipFile:
+                skipped.append(filename)
+        elif filename:
+            skipped.append(filename)
+    
+    return saved, skipped
+
+def remove_file(filepath):
+    """Delete a saved upload file if it is still there"""
+    try:
+        os.remove(filepath)
+    except OSError:
+        pass
+
+def remove_batch_files(batch_id):
+    """Delete any saved files left over for a batch"""
+    for filepath in glob.glob(os.path.join(app.config['UPLOAD_FOLDER'], f'{batch_id}_*')):
+        remove_file(filepath)
+
+def set_batch_file_status(upload_id, status, **values):
+    """Move a batch file to status, with any other column values, if it is still unfinished
+
+    A conditional UPDATE, so a file fail_stalled_batches() has already marked
+    failed is never switched back. Returns False if the file was left alone.
+    """
+    updated = CSVUpload.query.filter(
+        CSVUpload.id == upload_id, CSVUpload.status.in_(UNFINISHED_STATUSES)
+    ).update({'status': status, 'status_updated_at': datetime.utcnow(), **values},
+             synchronize_session=False)
+    return updated == 1
+
+def write_batch_file(upload_id, filename, filepath, parse_future):
+    """Store one parsed batch file, or mark it failed if parsing or writing raised"""
+    with app.app_context():
+        try:
+            if not set_batch_file_status(upload_id, 'processing'):
+                # Already marked failed as stalled, which also removed its file
+                db.session.rollback()
+                remove_file(filepath)
+                print(f"⚠️ Batch upload {upload_id} ({filename}) was already marked failed; skipping it")
+                return
+            db.session.commit()
+            invalidate_upload_counts()
+            
+            try:
+                schema, encoded_rows, preview_data = parse_future.result()
+            finally:
+                # Parsing is done with the file; remove it before the final status is visible
+                remove_file(filepath)
+            insert_csv_rows(upload_id, encoded_rows)
+            if not set_batch_file_status(
+                upload_id, 'completed', total_rows=len(encoded_rows),
+                column_schema=json.dumps(schema), preview_data=preview_data
+            ):
+                # Marked failed as stalled while the rows were written; drop them
+                db.session.rollback()
+                print(f"⚠️ Batch upload {upload_id} ({filename}) was marked failed while writing; discarded")
+                return
+            db.session.commit()
+        except Exception as e:
+            # Roll back before touching the session again; it is unusable after a failed flush
+            db.session.rollback()
+            print(f"❌ Batch upload {upload_id} ({filename}) failed: {e}")
+            try:
+                set_batch_file_status(upload_id, 'failed')
+                db.session.commit()
+            except Exception as status_error:
+                db.session.rollback()
+                print(f"❌ Could not mark batch upload {upload_id} failed: {status_error}")
+        finally:
+            invalidate_upload_counts()
+
+def log_batch_future_error(upload_id, future):
+    """Done-callback that reports exceptions no one else reads from a batch future"""
+    error = future.exception()
+    if error is not None:
+        print(f"❌ Batch upload {upload_id} worker error: {error!r}")
+
+def submit_batch_file(upload_id, filename, filepath, schema_overrides):
+    """Parse a saved file in the process pool, then hand the result to a writer thread"""
+    parse_pool, write_pool = get_batch_executors()
+    try:
+        parse_future = parse_pool.submit(parse_csv_file, filepath, schema_overrides)
+    except BrokenProcessPool:
+        # A crashed worker breaks the whole pool; start a new one
+        parse_pool, write_pool = get_batch_executors(replace_parse_pool=True)
+        parse_future = parse_pool.submit(parse_csv_file, filepath, schema_overrides)
+    
+    def on_parsed(future):
+        write_future = write_pool.submit(write_batch_file, upload_id, filename, filepath, future)
+        write_future.add_done_callback(functools.partial(log_batch_future_error, upload_id))
+    
+    parse_future.add_done_callback(on_parsed)
+
+def fail_stalled_batches(batch_id=None):
+    """Mark unfinished files failed in batches with no progress for BATCH_STALL_TIMEOUT
+
+    Returns the number of files marked failed.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=BATCH_STALL_TIMEOUT)
+    last_change = db.func.max(db.func.coalesce(CSVUpload.status_updated_at, CSVUpload.upload_date))
+    unfinished = db.func.sum(db.case((CSVUpload.status.in_(UNFINISHED_STATUSES), 1), else_=0))
+    
+    query = db.session.query(CSVUpload.batch_id).filter(CSVUpload.batch_id.isnot(None))
+    if batch_id:
+        query = query.filter(CSVUpload.batch_id == batch_id)
+    stalled = [row.batch_id for row in query.group_by(CSVUpload.batch_id).having(
+        unfinished > 0
+    ).having(last_change < cutoff)]
+    if not stalled:
+        return 0
+    
+    failed = CSVUpload.query.filter(
+        CSVUpload.batch_id.in_(stalled), CSVUpload.status.in_(UNFINISHED_STATUSES)
+    ).update({'status': 'failed', 'status_updated_at': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    invalidate_upload_counts()
+    for stalled_batch_id in stalled:
+        remove_batch_files(stalled_batch_id)
+    print(f"⚠️ Marked {failed} stalled batch upload(s) failed")
+    return failed
+
+def batch_report(batch_id):
+    """Aggregate the status of every upload in a batch"""
+    fail_stalled_batches(batch_id)
+    uploads = CSVUpload.query.filter_by(batch_id=batch_id).order_by(CSVUpload.id).all()
+    counts = {}
+    for upload in uploads:
+        counts[upload.status] = counts.get(upload.status, 0) + 1
+    finished = counts.get('completed', 0) + counts.get('failed', 0)
+    
+    return {
+        'batch_id': batch_id,
+        'total_files': len(uploads),
+        'finished_files': finished,
+        'status_counts': counts,
+        'total_rows': sum(upload.total_rows for upload in uploads),
+        'done': finished == len(uploads),
+        'uploads': [upload.to_dict() for upload in uploads]
+    }
+
+@app.route('/upload/batch', methods=['POST'])
+def upload_batch():
+    """Accept many CSV files (or zips of CSVs) and ingest them in parallel"""
+    # The whole batch is bounded by BATCH_MAX_BYTES, not the single-file MAX_CONTENT_LENGTH
+    request.max_content_length = BATCH_MAX_BYTES
+    request.max_form_parts = BATCH_MAX_FILES + 10
+    try:
+        if not init_database():
+            return jsonify({'success': False, 'message': 'Database initialization failed'})
+        
+        files = request.files.getlist('files')
+        if not files:
+            return jsonify({'success': False, 'message': 'No files selected'})
+        
+        try:
+            schema_overrides = parse_schema_overrides(request.form.get('schema'))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': f'Invalid schema: {str(e)}'})
+        
+        batch_id = uuid.uuid4().hex
+        try:
+            saved, skipped = save_batch_files(files, batch_id)
+        except ValueError as e:
+            remove_batch_files(batch_id)
+            return jsonify({'success': False, 'message': str(e)}), 400
+        if not saved:
+            return jsonify({'success': False, 'message': 'No CSV files found in upload', 'skipped': skipped})
+        
+        # Create every record up front so the batch report covers all files immediately
+        upload_records = [
+            CSVUpload(filename=filename, total_rows=0, status='queued', batch_id=batch_id)
+            for filename, _ in saved
+        ]
+        db.session.add_all(upload_records)
+        db.session.commit()
+        invalidate_upload_counts()
+        
+        for upload_record, (filename, filepath) in zip(upload_records, saved):
+            submit_batch_file(upload_record.id, filename, filepath, schema_overrides)
+        
+        return jsonify({
+            'success': True,
+            'message': f'Batch queued: {len(saved)} files.',
+            'skipped': skipped,
+            **batch_report(batch_id)
+        }), 202
+    
+    except RequestEntityTooLarge:
+        return jsonify({
+            'success': False,
+            'message': f'Batch exceeds the limit of {BATCH_MAX_BYTES} bytes or {BATCH_MAX_FILES} files'
+        }), 413
+    except Exception as e:
+        try:
+            db.session.rollback()
+        except:
+            pass
+        return jsonify({'success': False, 'message': f'Batch upload failed: {str(e)}'})
+
+@app.route('/upload/batch/<batch_id>')
+def get_batch_status(batch_id):
+    try:
+        report = batch_report(batch_id)
+        if report['total_files'] == 0:
+            return jsonify({'success': False, 'message': 'Batch not found'}), 404
+        return jsonify({'success': True, **report})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error fetching batch: {str(e)}'})
+
+# Uploads list pagination
+UPLOADS_PAGE_SIZE = 50
+UPLOADS_MAX_PAGE_SIZE = 200
+UPLOAD_COUNT_CACHE_TTL = int(os.getenv('UPLOAD_COUNT_CACHE_TTL', '30'))  # seconds
+
+# Total upload counts keyed by status filter: {statuses: (count, cached_at)}
+_upload_count_cache = {}
+
+def invalidate_upload_counts():
+    """Drop cached upload counts after an upload is added or changes status"""
+    _upload_count_cache.clear()
+
+def count_uploads(statuses):
+    """Return the total number of uploads matching statuses, cached for a short TTL"""
+    key = tuple(sorted(statuses))
+    cached = _upload_count_cache.get(key)
+    now = time.monotonic()
+    if cached and now - cached[1] < UPLOAD_COUNT_CACHE_TTL:
+        return cached[0]
+    
+    query = db.session.query(db.func.count(CSVUpload.id))
+    if statuses:
+        query = query.filter(CSVUpload.status.in_(statuses))
+    total = query.scalar()
+    _upload_count_cache[key] = (total, now)
+    return total
+
+def encode_uploads_cursor(upload):
+    """Encode the keyset position of an upload as an opaque cursor"""
+    return f"{upload.upload_date.isoformat()}_{upload.id}"
+
+def decode_uploads_cursor(cursor):
+    """Decode a cursor from encode_uploads_cursor into (upload_date, id)"""
+    upload_date, upload_id = cursor.rsplit('_', 1)
+    return datetime.fromisoformat(upload_date), int(upload_id)
+
 @app.route('/uploads')
 def get_uploads():
     try:
-        uploads = CSVUpload.query.order_by(CSVUpload.upload_date.desc()).all()
+        try:
+            limit = int(request.args.get('limit', UPLOADS_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Invalid limit'}), 400
+        limit = max(1, min(limit, UPLOADS_MAX_PAGE_SIZE))
+        
+        statuses = [s for s in request.args.get('status', '').split(',') if s]
+        
+        query = CSVUpload.query
+        if statuses:
+            query = query.filter(CSVUpload.status.in_(statuses))
+        
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                cursor_date, cursor_id = decode_uploads_cursor(cursor)
+            except ValueError:
+                return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+            # Rows strictly after the cursor in (upload_date desc, id desc) order
+            query = query.filter(db.or_(
+                CSVUpload.upload_date < cursor_date,
+                db.and_(CSVUpload.upload_date == cursor_date, CSVUpload.id < cursor_id)
+            ))
+        
+        # Fetch one extra row to know whether another page exists
+        uploads = query.order_by(
+            CSVUpload.upload_date.desc(), CSVUpload.id.desc()
+        ).limit(limit + 1).all()
+        has_more = len(uploads) > limit
+        uploads = uploads[:limit]
+        
         return jsonify({
             'success': True,
-            'uploads': [upload.to_dict() for upload in uploads]
+            'uploads': [upload.to_dict() for upload in uploads],
+            'total': count_uploads(statuses),
+            'next_cursor': encode_uploads_cursor(uploads[-1]) if has_more else None
         })
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error fetching uploads: {str(e)}'})
 
+# Maximum rows returned by one /upload/<id>/data page
+DATA_MAX_PAGE_SIZE = 1000
+
+@app.route('/upload/<int:upload_id>/preview')
+def get_upload_preview(upload_id):
+    """First rows plus a uniform random sample, stored at ingestion so this is one row read"""
+    try:
+        upload = CSVUpload.query.get_or_404(upload_id)
+        columns = upload.get_columns()
+        
+        if upload.preview_data:
+            preview = json.loads(upload.preview_data)
+            head = [{'row_number': n, 'row_data': dict(zip(columns, row))} for n, row in preview['head']]
+            sample = [{'row_number': n, 'row_data': dict(zip(columns, row))} for n, row in preview['sample']]
+        else:
+            # Uploads from before previews were captured: fall back to the first rows
+            data_rows = CSVData.query.filter_by(upload_id=upload_id).order_by(
+                CSVData.row_number
+            ).limit(PREVIEW_HEAD_ROWS).all()
+            head = [row.to_dict(columns) for row in data_rows]
+            sample = []
+        
+        return jsonify({
+            'success': True,
+            'upload': upload.to_dict(include_schema=True),
+            'head': head,
+            'sample': sample
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error fetching preview: {str(e)}'})
+
 @app.route('/upload/<int:upload_id>/data')
 def get_upload_data(upload_id):
+    """Rows of an upload in order; pass limit (and after_row) to page through them"""
     try:
         upload = CSVUpload.query.get_or_404(upload_id)
-        data_rows = CSVData.query.filter_by(upload_id=upload_id).order_by(CSVData.row_number).all()
+        query = CSVData.query.filter_by(upload_id=upload_id)
+        
+        after_row = request.args.get('after_row', type=int)
+        if after_row:
+            query = query.filter(CSVData.row_number > after_row)
+        query = query.order_by(CSVData.row_number)
+        
+        limit = request.args.get('limit', type=int)
+        if limit:
+            limit = max(1, min(limit, DATA_MAX_PAGE_SIZE))
+            query = query.limit(limit)
+        
+        data_rows = query.all()
+        columns = upload.get_columns()
         
         return jsonify({
             'success': True,
-            'upload': upload.to_dict(),
-            'data': [row.to_dict() for row in data_rows]
+            'upload': upload.to_dict(include_schema=True),
+            'data': [row.to_dict(columns) for row in data_rows],
+            'next_after_row': data_rows[-1].row_number if limit and len(data_rows) == limit else None
         })
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error fetching data: {str(e)}'})
@@ -341,35 +832,138 @@ def simple_status():
         'environment': 'production' if os.environ.get('DATABASE_URL') else 'development'
     })
 
-@app.route('/health')
-def health_check():
+# Background health checks
+HEALTH_CHECK_INTERVAL = int(os.getenv('HEALTH_CHECK_INTERVAL', '30'))  # seconds
+# Bounds each database probe, so a hung database cannot stall the monitor
+HEALTH_CHECK_TIMEOUT = int(os.getenv('HEALTH_CHECK_TIMEOUT', '5'))  # seconds
+# Cached results older than this are reported unhealthy (the monitor has stalled)
+HEALTH_STALE_AFTER = HEALTH_CHECK_INTERVAL * 3
+
+_health_state = {'status': 'starting', 'components': {}, 'checked_at': None}
+_health_lock = threading.Lock()
+_health_monitor_pid = None
+_health_engine = None
+
+def health_connect_args(database_url):
+    """Driver options that limit how long a health probe waits on the database"""
+    url = sqlalchemy.engine.make_url(database_url)
+    if url.get_backend_name() == 'sqlite' or url.get_driver_name() == 'pg8000':
+        return {'timeout': HEALTH_CHECK_TIMEOUT}
+    if url.get_driver_name() in ('psycopg2', 'psycopg'):
+        # libpq options: bound both the connection attempt and the query itself
+        return {
+            'connect_timeout': HEALTH_CHECK_TIMEOUT,
+            'options': f'-c statement_timeout={HEALTH_CHECK_TIMEOUT * 1000}'
+        }
+    return {}
+
+def check_database_health():
+    """Run SELECT 1 on a dedicated unpooled engine so probes never take an app pool connection"""
+    global _health_engine
+    if _health_engine is None:
+        # The app engine's URL, where Flask-SQLAlchemy has resolved relative SQLite paths
+        with app.app_context():
+            database_url = db.engine.url
+        _health_engine = sqlalchemy.create_engine(
+            database_url, poolclass=sqlalchemy.pool.NullPool,
+            connect_args=health_connect_args(database_url)
+        )
+    with _health_engine.connect() as connection:
+        connection.execute(sqlalchemy.text('SELECT 1'))
+
+def check_filesystem_health():
+    """Check the upload folder is writable, using a per-worker file name"""
+    test_file = os.path.join(app.config['UPLOAD_FOLDER'], f'.health_{os.getpid()}')
+    with open(test_file, 'w') as f:
+        f.write('test')
+    os.remove(test_file)
+
+def run_health_checks():
+    """Probe the database and filesystem and cache the results"""
     status = {'status': 'healthy', 'components': {}}
-    http_status = 200
     
     try:
-        # Test database connection
-        with db.engine.connect() as connection:
-            connection.execute(db.text('SELECT 1'))
+        check_database_health()
         status['components']['database'] = 'connected'
     except Exception as e:
         status['status'] = 'unhealthy'
         status['components']['database'] = f'error: {str(e)}'
-        http_status = 500
     
-    # Check if we can write to upload folder
     try:
-        test_file = os.path.join(app.config['UPLOAD_FOLDER'], 'test.txt')
-        with open(test_file, 'w') as f:
-            f.write('test')
-        os.remove(test_file)
+        check_filesystem_health()
         status['components']['filesystem'] = 'writable'
     except Exception as e:
         if status['status'] != 'unhealthy':
             status['status'] = 'degraded'
         status['components']['filesystem'] = f'error: {str(e)}'
     
+    status['checked_at'] = time.time()
+    with _health_lock:
+        _health_state.update(status)
+
+def health_monitor_loop():
+    """Run the health checks now and then every HEALTH_CHECK_INTERVAL seconds"""
+    while True:
+        try:
+            run_health_checks()
+        except Exception as e:
+            print(f"⚠️ Health check failed: {e}")
+        time.sleep(HEALTH_CHECK_INTERVAL)
+
+def start_health_monitor():
+    """Start the health monitor thread once per process"""
+    global _health_monitor_pid
+    with _health_lock:
+        if _health_monitor_pid == os.getpid():
+            return
+        _health_monitor_pid = os.getpid()
+    threading.Thread(target=health_monitor_loop, name='health-monitor', daemon=True).start()
+
+def start_health_monitor_after_fork():
+    """Threads do not survive gunicorn's fork after --preload; start one in each worker"""
+    global _health_lock
+    # The parent's monitor may have held the lock at the moment of the fork
+    _health_lock = threading.Lock()
+    start_health_monitor()
+
+def get_health_snapshot():
+    """Return a copy of the cached health results with their age
+
+    Results the monitor has not refreshed within HEALTH_STALE_AFTER are
+    reported unhealthy, so a stuck monitor never keeps serving 'healthy'.
+    """
+    with _health_lock:
+        snapshot = dict(_health_state, components=dict(_health_state['components']))
+    
+    checked_at = snapshot['checked_at']
+    snapshot['age_seconds'] = round(time.time() - checked_at, 1) if checked_at else None
+    snapshot['checked_at'] = datetime.utcfromtimestamp(checked_at).isoformat() if checked_at else None
+    snapshot['stale'] = checked_at is None or snapshot['age_seconds'] > HEALTH_STALE_AFTER
+    if checked_at and snapshot['stale']:
+        snapshot['status'] = 'unhealthy'
+        snapshot['components']['monitor'] = f"stale: no check for {snapshot['age_seconds']}s"
+    return snapshot
+
+@app.route('/health')
+def health_check():
+    """Cached health of all components; never touches the database or disk itself"""
+    status = get_health_snapshot()
+    http_status = 500 if status['status'] == 'unhealthy' else 200
     return jsonify(status), http_status
 
+@app.route('/health/live')
+def liveness_check():
+    """Liveness: the worker is up and serving requests"""
+    return jsonify({'status': 'alive'}), 200
+
+@app.route('/health/ready')
+def readiness_check():
+    """Readiness: the last cached checks passed and are recent"""
+    status = get_health_snapshot()
+    ready = status['status'] != 'unhealthy' and not status['stale']
+    status['ready'] = ready
+    return jsonify(status), 200 if ready else 503
+
 def startup_health_check():
     """Perform startup health checks"""
     print("🔍 Performing startup health checks...")
@@ -403,10 +997,21 @@ def startup_health_check():
     except Exception as e:
         print(f"❌ Templates: ERROR ({e})")
     
+    # Check 4: Batches orphaned by a previous worker
+    try:
+        with app.app_context():
+            failed = fail_stalled_batches()
+        print(f"✅ Stalled batches: OK ({failed} file(s) marked failed)")
+    except Exception as e:
+        print(f"⚠️ Stalled batches: ERROR ({e})")
+    
     print("🚀 Startup health checks completed")
 
-# Run startup checks
-startup_health_check()
+# Run startup checks, then keep checking in the background
+if not IS_BATCH_PARSE_WORKER:
+    startup_health_check()
+    start_health_monitor()
+    os.register_at_fork(after_in_child=start_health_monitor_after_fork)
 
 if __name__ == '__main__':
     with app.app_context():
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark the typed positional row encoding against the old JSON object rows
+
+Usage: python benchmark_row_encoding.py [csv_path] [copies]
+"""
+
+import json
+import sys
+import time
+
+import pandas as pd
+
+from app import CSVData
+from csv_ingest import clean_data_for_json, encode_row, infer_schema, read_csv_text
+
+def time_it(func, repeat=5):
+    """Return the best wall time of func over a few runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def encode_object_rows(df):
+    """Encode rows the way uploads were stored before: one JSON object per row"""
+    return [json.dumps(clean_data_for_json(row.to_dict())) for _, row in df.iterrows()]
+
+def encode_array_rows(df, schema):
+    """Encode rows with the app's typed positional encoding"""
+    return [encode_row(values, schema) for values in df.itertuples(index=False, name=None)]
+
+def run_benchmark(path='sample_data.csv', copies='2000'):
+    copies = int(copies)
+    print(f"📏 Benchmarking row encodings on {path} x{copies}...")
+    # Old rows stored pandas' own parse; the typed encoding starts from the CSV text
+    df = pd.concat([pd.read_csv(path)] * copies, ignore_index=True)
+    text_df = pd.concat([read_csv_text(path)] * copies, ignore_index=True)
+    schema = infer_schema(text_df)
+    columns = [column['name'] for column in schema]
+
+    object_rows = encode_object_rows(df)
+    array_rows = encode_array_rows(text_df, schema)
+
+    object_bytes = sum(len(row.encode('utf-8')) for row in object_rows)
+    array_bytes = sum(len(row.encode('utf-8')) for row in array_rows)
+    print(f"   Rows: {len(df)}")
+    print(f"   JSON object rows: {object_bytes:,} bytes")
+    print(f"   Typed array rows: {array_bytes:,} bytes "
+          f"({100 * (1 - array_bytes / object_bytes):.1f}% smaller)")
+
+    object_time = time_it(lambda: encode_object_rows(df), repeat=3)
+    array_time = time_it(lambda: encode_array_rows(text_df, schema), repeat=3)
+    print(f"   JSON object encode: {object_time * 1000:.1f} ms")
+    print(f"   Typed array encode: {array_time * 1000:.1f} ms "
+          f"({object_time / array_time:.2f}x)")
+
+    # Decode through CSVData.to_dict(), which handles both formats
+    object_records = [CSVData(row_data=row, row_number=n) for n, row in enumerate(object_rows, 1)]
+    array_records = [CSVData(row_data=row, row_number=n) for n, row in enumerate(array_rows, 1)]
+    object_time = time_it(lambda: [record.to_dict() for record in object_records])
+    array_time = time_it(lambda: [record.to_dict(columns) for record in array_records])
+    print(f"   JSON object decode: {object_time * 1000:.1f} ms")
+    print(f"   Typed array decode: {array_time * 1000:.1f} ms "
+          f"({object_time / array_time:.2f}x)")
+
+if __name__ == "__main__":
+    run_benchmark(*sys.argv[1:3])
@@ -0,0 +1,208 @@
+"""
+CSV parsing and typed row encoding, kept free of Flask and database imports
+so batch uploads can run it in worker processes
+"""
+
+import json
+import math
+import os
+import random
+import re
+from datetime import datetime
+
+import pandas as pd
+
+def clean_data_for_json(data):
+    """Clean data to make it JSON serializable"""
+    if isinstance(data, dict):
+        return {key: clean_data_for_json(value) for key, value in data.items()}
+    elif isinstance(data, list):
+        return [clean_data_for_json(item) for item in data]
+    elif pd.isna(data):
+        return None
+    elif isinstance(data, (pd.Timestamp, datetime)):
+        return data.isoformat()
+    elif isinstance(data, (int, float)) and pd.isna(data):
+        return None
+    else:
+        return data
+
+# Column types supported by the typed row encoding
+COLUMN_TYPES = ('string', 'integer', 'float', 'boolean', 'datetime')
+# Accepted in columns given the boolean type by a schema override
+TRUE_VALUES = {'true', 't', 'yes', 'y', '1'}
+FALSE_VALUES = {'false', 'f', 'no', 'n', '0'}
+# Inference only picks boolean for these, so Y/N or t/f text is never rewritten
+INFERRED_BOOLEAN_VALUES = {'true', 'false'}
+# Cells stored as null in non-string columns
+NULL_VALUES = {'', 'nan', 'null', 'none'}
+# Strict numeric text: no underscores, whitespace, inf or nan, unlike int()/float()
+INTEGER_PATTERN = re.compile(r'[+-]?\d+')
+FLOAT_PATTERN = re.compile(r'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?')
+# Numbers with leading zeros (zip codes, IDs) must stay strings to keep the zeros
+LEADING_ZERO_PATTERN = re.compile(r'[+-]?0\d')
+
+def read_csv_text(filepath):
+    """Read a CSV keeping every cell as its original text
+
+    Types are inferred from the text by infer_schema(), with the same rules
+    as api/index.py, rather than by pandas, which would turn '02134' into
+    2134 and 'inf' into a float.
+    """
+    return pd.read_csv(filepath, dtype=str, keep_default_na=False)
+
+def is_float_text(value):
+    """Whether a cell is a finite number in strict decimal or exponent notation"""
+    return bool(FLOAT_PATTERN.fullmatch(value)) and math.isfinite(float(value))
+
+def is_datetime_text(value):
+    """Whether a cell is an ISO 8601 date or datetime"""
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+def infer_column_type(values):
+    """Infer the narrowest column type that stores every non-empty cell without loss"""
+    present = [value.strip() for value in values
+               if isinstance(value, str) and value.strip().lower() not in NULL_VALUES]
+    if not present or any(LEADING_ZERO_PATTERN.match(value) for value in present):
+        return 'string'
+    if all(INTEGER_PATTERN.fullmatch(value) for value in present):
+        return 'integer'
+    if all(is_float_text(value) for value in present):
+        return 'float'
+    if all(value.lower() in INFERRED_BOOLEAN_VALUES for value in present):
+        return 'boolean'
+    if all(is_datetime_text(value) for value in present):
+        return 'datetime'
+    return 'string'
+
+def infer_schema(df, overrides=None):
+    """Build the upload schema from a DataFrame of CSV text, applying user type overrides"""
+    overrides = overrides or {}
+    unknown = set(overrides) - {str(name) for name in df.columns}
+    if unknown:
+        raise ValueError(f"Schema override for unknown column(s): {', '.join(sorted(unknown))}")
+    
+    schema = []
+    for name, series in df.items():
+        column_type = overrides.get(str(name)) or infer_column_type(series.tolist())
+        if column_type not in COLUMN_TYPES:
+            raise ValueError(f"Unsupported type '{column_type}' for column '{name}'")
+        schema.append({'name': str(name), 'type': column_type})
+    return schema
+
+def parse_schema_overrides(raw):
+    """Parse the optional 'schema' form field: a JSON object of column name to type"""
+    if not raw:
+        return {}
+    overrides = json.loads(raw)
+    if not isinstance(overrides, dict):
+        raise ValueError('Schema overrides must be a JSON object of column name to type')
+    return overrides
+
+def coerce_value(value, column_type):
+    """Convert a CSV cell to the JSON value stored for its column type"""
+    # Short rows leave NaN in the missing cells
+    value = clean_data_for_json(value)
+    if value is None or column_type == 'string':
+        # Text is stored exactly as uploaded, surrounding whitespace included
+        return value
+    value = value.strip()
+    if value.lower() in NULL_VALUES:
+        return None
+    
+    if column_type == 'integer':
+        if not INTEGER_PATTERN.fullmatch(value):
+            raise ValueError(f"'{value}' is not an integer")
+        # int() on the text keeps values above 2**53 exact
+        return int(value)
+    if column_type == 'float':
+        if not FLOAT_PATTERN.fullmatch(value):
+            raise ValueError(f"'{value}' is not a number")
+        number = float(value)
+        # e.g. 1e999; JSON has no Infinity
+        if not math.isfinite(number):
+            raise ValueError(f"'{value}' is out of range")
+        return number
+    if column_type == 'boolean':
+        lowered = value.lower()
+        if lowered in TRUE_VALUES:
+            return True
+        if lowered in FALSE_VALUES:
+            return False
+        raise ValueError(f"'{value}' is not a boolean")
+    if column_type == 'datetime':
+        # Validate, but keep the original text: '2024-01-01' must not become '2024-01-01T00:00:00'
+        if not is_datetime_text(value):
+            raise ValueError(f"'{value}' is not an ISO date or datetime")
+        return value
+    return value
+
+def encode_row(values, schema):
+    """Encode one row as a compact JSON array ordered by the schema"""
+    encoded = []
+    for value, column in zip(values, schema):
+        try:
+            encoded.append(coerce_value(value, column['type']))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Column '{column['name']}': {e}") from e
+    return json.dumps(encoded, separators=(',', ':'))
+
+# Upload previews, captured during ingestion
+PREVIEW_HEAD_ROWS = int(os.getenv('PREVIEW_HEAD_ROWS', '20'))
+PREVIEW_SAMPLE_ROWS = int(os.getenv('PREVIEW_SAMPLE_ROWS', '100'))
+
+class PreviewSampler:
+    """Keep the first rows of an upload plus a uniform reservoir sample of all rows"""
+    
+    def __init__(self, head_size=PREVIEW_HEAD_ROWS, sample_size=PREVIEW_SAMPLE_ROWS):
+        self.head_size = head_size
+        self.sample_size = sample_size
+        self.head = []
+        self.sample = []
+        self.seen = 0
+        self.rng = random.Random()
+    
+    def add(self, row_number, encoded_row):
+        """Offer one encoded row; rows must be added in order"""
+        self.seen += 1
+        if len(self.head) < self.head_size:
+            self.head.append((row_number, encoded_row))
+        
+        # Algorithm R: every row seen so far stays in the sample with equal probability
+        if len(self.sample) < self.sample_size:
+            self.sample.append((row_number, encoded_row))
+        else:
+            slot = self.rng.randrange(self.seen)
+            if slot < self.sample_size:
+                self.sample[slot] = (row_number, encoded_row)
+    
+    def to_json(self):
+        """Serialize the preview for CSVUpload.preview_data"""
+        return json.dumps({
+            'head': [[row_number, json.loads(row)] for row_number, row in self.head],
+            'sample': [[row_number, json.loads(row)] for row_number, row in sorted(self.sample)]
+        }, separators=(',', ':'))
+
+def encode_csv_rows(df, schema):
+    """Encode every DataFrame row; returns (encoded rows, preview JSON)"""
+    sampler = PreviewSampler()
+    encoded_rows = []
+    for index, values in enumerate(df.itertuples(index=False, name=None)):
+        encoded = encode_row(values, schema)
+        encoded_rows.append(encoded)
+        sampler.add(index + 1, encoded)
+    return encoded_rows, sampler.to_json()
+
+def parse_csv_file(filepath, schema_overrides=None):
+    """Parse and encode a saved CSV file; returns (schema, encoded rows, preview JSON)
+
+    Runs in batch upload worker processes, so everything it needs lives in this module.
+    """
+    df = read_csv_text(filepath)
+    schema = infer_schema(df, schema_overrides)
+    encoded_rows, preview_data = encode_csv_rows(df, schema)
+    return schema, encoded_rows, preview_data
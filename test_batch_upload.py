@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Batch upload test: failed and orphaned files must finish the batch instead of hanging it
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+
+from test_ingestion import ROOT, load_module
+
+def load_app(tmp):
+    return load_module('app_batch_test', os.path.join(ROOT, 'app.py'), {
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'test.db')}",
+        'UPLOAD_FOLDER': tmp,
+        'BATCH_PARSE_WORKERS': '2',
+        'BATCH_MAX_BYTES': str(1024 * 1024),
+    })
+
+def wait_for_batch(client, batch_id, timeout=60):
+    """Poll the batch report until it is done"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        report = client.get(f'/upload/batch/{batch_id}').get_json()
+        if report['done']:
+            return report
+        time.sleep(0.2)
+    raise AssertionError(f'Batch {batch_id} did not finish: {report["status_counts"]}')
+
+def test_batch_failure_path():
+    print("1️⃣ Testing a batch with a failing file...")
+    with tempfile.TemporaryDirectory() as tmp:
+        module = load_app(tmp)
+        client = module.app.test_client()
+
+        good = "a,b\n" + "".join(f"{i},x{i}\n" for i in range(1000))
+        response = client.post('/upload/batch', data={
+            'files': [
+                (io.BytesIO(good.encode()), 'good.csv'),
+                (io.BytesIO(b"a,b\n1,x\noops,y\n"), 'bad.csv'),
+            ],
+            'schema': json.dumps({'a': 'integer'}),
+        }, content_type='multipart/form-data')
+        assert response.status_code == 202, response.get_json()
+
+        report = wait_for_batch(client, response.get_json()['batch_id'])
+        assert report['status_counts'] == {'completed': 1, 'failed': 1}, report['status_counts']
+        assert report['total_rows'] == 1000
+
+        with module.app.app_context():
+            failed = module.CSVUpload.query.filter_by(status='failed').one()
+            assert module.CSVData.query.filter_by(upload_id=failed.id).count() == 0
+        # Saved batch files are removed once processed
+        assert [name for name in os.listdir(tmp) if name.endswith('.csv')] == []
+    print("✅ Failing file OK")
+
+def test_oversized_zip_rejected():
+    print("2️⃣ Testing an oversized zip is rejected before extraction...")
+    with tempfile.TemporaryDirectory() as tmp:
+        module = load_app(tmp)
+        client = module.app.test_client()
+
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('bomb.csv', b'0' * (8 * 1024 * 1024))
+        archive.seek(0)
+
+        response = client.post('/upload/batch', data={'files': [(archive, 'bomb.zip')]},
+                               content_type='multipart/form-data')
+        assert response.status_code == 400, response.get_json()
+        assert [name for name in os.listdir(tmp) if name.endswith('.csv')] == []
+    print("✅ Oversized zip OK")
+
+def test_batch_body_limit():
+    print("3️⃣ Testing batches are bounded by BATCH_MAX_BYTES, not MAX_CONTENT_LENGTH...")
+    with tempfile.TemporaryDirectory() as tmp:
+        module = load_app(tmp)
+        module.app.config['MAX_CONTENT_LENGTH'] = 64 * 1024
+        client = module.app.test_client()
+        csv_content = ("a,b\n" + "".join(f"{i},x{i}\n" for i in range(20000))).encode()
+
+        # Above the single-file limit but within BATCH_MAX_BYTES
+        response = client.post('/upload/batch', data={
+            'files': [(io.BytesIO(csv_content), f'part{i}.csv') for i in range(2)],
+        }, content_type='multipart/form-data')
+        assert response.status_code == 202, response.get_json()
+        wait_for_batch(client, response.get_json()['batch_id'])
+
+        # Above BATCH_MAX_BYTES: rejected with 413 and a JSON body
+        response = client.post('/upload/batch', data={
+            'files': [(io.BytesIO(csv_content), f'part{i}.csv') for i in range(8)],
+        }, content_type='multipart/form-data')
+        assert response.status_code == 413, response.status_code
+        assert not response.get_json()['success']
+    print("✅ Batch body limit OK")
+
+def test_stalled_batch_marked_failed():
+    print("4️⃣ Testing a batch orphaned by a worker restart is marked failed...")
+    with tempfile.TemporaryDirectory() as tmp:
+        module = load_app(tmp)
+        client = module.app.test_client()
+
+        stalled_at = datetime.utcnow() - timedelta(seconds=module.BATCH_STALL_TIMEOUT + 60)
+        with module.app.app_context():
+            module.db.session.add_all([
+                module.CSVUpload(filename='a.csv', total_rows=0, status='processing',
+                                 batch_id='orphaned', status_updated_at=stalled_at),
+                module.CSVUpload(filename='b.csv', total_rows=0, status='queued',
+                                 batch_id='orphaned', status_updated_at=stalled_at),
+            ])
+            module.db.session.commit()
+
+        report = client.get('/upload/batch/orphaned').get_json()
+        assert report['done'], report
+        assert report['status_counts'] == {'failed': 2}, report['status_counts']
+    print("✅ Stalled batch OK")
+
+def test_vercel_stalled_batch_marked_failed():
+    print("5️⃣ Testing a Vercel batch cut off by the function timeout is marked failed...")
+    module = load_module('api_batch_test', os.path.join(ROOT, 'api', 'index.py'), {})
+    client = module.app.test_client()
+
+    response = client.post('/upload/batch', data={
+        'files': [(io.BytesIO(b"a\n1\n"), 'good.csv'), (io.BytesIO(b"a\n1\n"), 'cut.csv')],
+    }, content_type='multipart/form-data')
+    batch_id = response.get_json()['batch_id']
+    assert response.get_json()['status_counts'] == {'completed': 2}
+
+    # Simulate the function being killed before the second file was written
+    stalled_at = datetime.utcnow() - timedelta(seconds=module.BATCH_STALL_TIMEOUT + 60)
+    with module.app.app_context():
+        module.CSVUpload.query.filter_by(batch_id=batch_id).update({'status_updated_at': stalled_at})
+        module.CSVUpload.query.filter_by(batch_id=batch_id, filename='cut.csv').update({'status': 'queued'})
+        module.db.session.commit()
+
+    report = client.get(f'/upload/batch/{batch_id}').get_json()
+    assert report['done'], report
+    assert report['status_counts'] == {'completed': 1, 'failed': 1}, report['status_counts']
+    print("✅ Vercel stalled batch OK")
+
+def test_stalled_file_not_revived():
+    print("6️⃣ Testing a file marked failed as stalled stays failed...")
+    with tempfile.TemporaryDirectory() as tmp:
+        module = load_app(tmp)
+        filepath = os.path.join(tmp, 'late.csv')
+        with open(filepath, 'w') as f:
+            f.write("a,b\n1,x\n2,y\n")
+        parsed = Future()
+        parsed.set_result(module.parse_csv_file(filepath))
+
+        with module.app.app_context():
+            before = module.CSVUpload(filename='late.csv', total_rows=0, status='failed', batch_id='late')
+            during = module.CSVUpload(filename='late.csv', total_rows=0, status='queued', batch_id='late')
+            module.db.session.add_all([before, during])
+            module.db.session.commit()
+            before_id, during_id = before.id, during.id
+
+        # Marked failed before its writer started
+        module.write_batch_file(before_id, 'late.csv', filepath, parsed)
+
+        # Marked failed while its rows were being written
+        insert_csv_rows = module.insert_csv_rows
+        def insert_after_stall(upload_id, encoded_rows):
+            with module.db.engine.begin() as connection:
+                connection.execute(module.db.text(
+                    "UPDATE csv_upload SET status = 'failed' WHERE id = :id"
+                ), {'id': upload_id})
+            insert_csv_rows(upload_id, encoded_rows)
+        module.insert_csv_rows = insert_after_stall
+        module.write_batch_file(during_id, 'late.csv', filepath, parsed)
+
+        with module.app.app_context():
+            for upload_id in (before_id, during_id):
+                upload = module.db.session.get(module.CSVUpload, upload_id)
+                assert upload.status == 'failed', upload.status
+                assert module.CSVData.query.filter_by(upload_id=upload_id).count() == 0
+    print("✅ Stalled file OK")
+
+def test_parse_worker_import_skips_startup():
+    print("7️⃣ Testing parse workers importing app.py skip database startup...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'test.db')
+        # Spawned workers re-import the script as __mp_main__ when run as `python app.py`
+        module = load_module('__mp_main__', os.path.join(ROOT, 'app.py'), {
+            'DATABASE_URL': f'sqlite:///{db_path}',
+            'UPLOAD_FOLDER': tmp,
+        })
+        assert module.IS_BATCH_PARSE_WORKER
+        assert not os.path.exists(db_path), 'parse worker touched the database'
+    print("✅ Parse worker import OK")
+
+if __name__ == "__main__":
+    try:
+        test_batch_failure_path()
+        test_oversized_zip_rejected()
+        test_batch_body_limit()
+        test_stalled_batch_marked_failed()
+        test_vercel_stalled_batch_marked_failed()
+        test_stalled_file_not_revived()
+        test_parse_worker_import_skips_startup()
+        print("🎉 All batch upload tests passed!")
+    except AssertionError as e:
+        print(f"❌ Batch upload test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Health check test: probes must be served from the background monitor's cached results
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from test_ingestion import ROOT, load_module
+
+def load_app(tmp):
+    # A long interval so the monitor runs its first check and then stays out of the way
+    return load_module('app_health_test', os.path.join(ROOT, 'app.py'), {
+        'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'test.db')}",
+        'UPLOAD_FOLDER': tmp,
+        'HEALTH_CHECK_INTERVAL': '3600',
+    })
+
+def wait_for_first_check(module, timeout=10):
+    deadline = time.time() + timeout
+    while module._health_state['checked_at'] is None:
+        assert time.time() < deadline, 'health monitor never ran'
+        time.sleep(0.05)
+
+def test_health_served_from_cache():
+    print("1️⃣ Testing /health and /health/ready use cached results...")
+    with tempfile.TemporaryDirectory() as tmp:
+        module = load_app(tmp)
+        # Started at import, not by the first probe
+        assert module._health_monitor_pid == os.getpid()
+        wait_for_first_check(module)
+        # Probes the app's own database
+        with module.app.app_context():
+            assert module._health_engine.url == module.db.engine.url
+
+        probes = []
+        module.check_database_health = lambda: probes.append('database')
+        client = module.app.test_client()
+        for _ in range(5):
+            response = client.get('/health')
+            assert response.status_code == 200, response.get_json()
+            assert response.get_json()['status'] == 'healthy'
+        assert client.get('/health/ready').status_code == 200
+        assert probes == [], 'a probe ran the checks itself'
+    print("✅ Cached health OK")
+
+def test_stale_results_reported_unhealthy():
+    print("2️⃣ Testing stale results from a stuck monitor are not served as healthy...")
+    with tempfile.TemporaryDirectory() as tmp:
+        module = load_app(tmp)
+        wait_for_first_check(module)
+        module._health_state['checked_at'] = time.time() - module.HEALTH_STALE_AFTER - 1
+        client = module.app.test_client()
+
+        response = client.get('/health')
+        assert response.status_code == 500, response.get_json()
+        assert response.get_json()['stale']
+        assert 'monitor' in response.get_json()['components']
+
+        response = client.get('/health/ready')
+        assert response.status_code == 503
+        assert response.get_json()['ready'] is False
+        assert client.get('/health/live').status_code == 200
+    print("✅ Stale health OK")
+
+def test_database_failure_not_ready():
+    print("3️⃣ Testing a failed database check makes the worker unhealthy and not ready...")
+    with tempfile.TemporaryDirectory() as tmp:
+        module = load_app(tmp)
+        wait_for_first_check(module)
+
+        def failing_check():
+            raise RuntimeError('connection refused')
+        module.check_database_health = failing_check
+        module.run_health_checks()
+        client = module.app.test_client()
+
+        response = client.get('/health')
+        assert response.status_code == 500
+        assert response.get_json()['components']['database'] == 'error: connection refused'
+        assert client.get('/health/ready').status_code == 503
+        assert client.get('/health/live').status_code == 200
+    print("✅ Database failure OK")
+
+def test_monitor_started_in_forked_worker():
+    print("4️⃣ Testing each forked worker starts its own monitor...")
+    if not hasattr(os, 'fork'):
+        print("⏭️ No os.fork on this platform")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        module = load_app(tmp)
+        pid = os.fork()
+        if pid == 0:
+            # Like a gunicorn worker after --preload
+            os._exit(0 if module._health_monitor_pid == os.getpid() else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0, 'forked worker has no health monitor'
+    print("✅ Forked worker OK")
+
+if __name__ == "__main__":
+    try:
+        test_health_served_from_cache()
+        test_stale_results_reported_unhealthy()
+        test_database_failure_not_ready()
+        test_monitor_started_in_forked_worker()
+        print("🎉 All health check tests passed!")
+    except AssertionError as e:
+        print(f"❌ Health check test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Typed ingestion test: values must survive upload and read back unchanged
+"""
+
+import importlib.util
+import io
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Big integer above 2**53, a zip code with a leading zero, text int()/float() would accept,
+# Y/N text, true/false booleans, dates and whole-valued floats
+TYPED_CSV = (
+    "big,zip,ratio,label,amount,answer,active,day,price\n"
+    "9007199254740993,02134,inf,1_000,1.5,Y,true,2024-01-01,10.0\n"
+    "1,10001,2.5,2,,N,False,2024-01-02T03:04:05,20.0\n"
+).encode()
+
+# Both apps must infer the same schema and store the values without loss
+TYPED_SCHEMA = {
+    'big': 'integer', 'zip': 'string', 'ratio': 'string', 'label': 'string', 'amount': 'float',
+    'answer': 'string', 'active': 'boolean', 'day': 'datetime', 'price': 'float'
+}
+TYPED_ROWS = [
+    {'big': 9007199254740993, 'zip': '02134', 'ratio': 'inf', 'label': '1_000', 'amount': 1.5,
+     'answer': 'Y', 'active': True, 'day': '2024-01-01', 'price': 10.0},
+    {'big': 1, 'zip': '10001', 'ratio': '2.5', 'label': '2', 'amount': None,
+     'answer': 'N', 'active': False, 'day': '2024-01-02T03:04:05', 'price': 20.0},
+]
+
+def load_module(name, path, env):
+    """Import a fresh copy of an app module with the given environment"""
+    saved = dict(os.environ)
+    os.environ.pop('DATABASE_URL', None)
+    os.environ.update(env)
+    try:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+    return module
+
+def upload_and_read(module):
+    """Upload TYPED_CSV through /upload and return the stored rows and schema"""
+    client = module.app.test_client()
+    result = client.post('/upload', data={'file': (io.BytesIO(TYPED_CSV), 'typed.csv')}).get_json()
+    assert result['success'], result
+
+    # The uploads list is summary-only; the schema comes with the rows
+    uploads = client.get('/uploads').get_json()['uploads']
+    assert all('schema' not in upload for upload in uploads), uploads
+
+    # Parse the raw body: Infinity or NaN in it would break the browser's response.json()
+    response = client.get(f"/upload/{result['upload_id']}/data")
+    body = json.loads(response.get_data(as_text=True), parse_constant=reject_constant)
+    preview = client.get(f"/upload/{result['upload_id']}/preview").get_json()
+    assert preview['upload']['schema'] == body['upload']['schema']
+    schema = {column['name']: column['type'] for column in body['upload']['schema']}
+    return [row['row_data'] for row in body['data']], schema
+
+def reject_constant(name):
+    raise AssertionError(f'Response contains invalid JSON constant {name}')
+
+def check_typed_round_trip(rows, schema):
+    assert schema == TYPED_SCHEMA, schema
+    assert rows == TYPED_ROWS, rows
+    # 10.0 == 10 in Python, so check the whole-valued floats kept their type
+    assert all(isinstance(row['price'], float) for row in rows)
+
+def test_render_app_round_trip():
+    print("1️⃣ Testing typed round-trip through app.py...")
+    with tempfile.TemporaryDirectory() as tmp:
+        module = load_module('app_typed_test', os.path.join(ROOT, 'app.py'), {
+            'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'test.db')}",
+            'UPLOAD_FOLDER': tmp,
+        })
+        check_typed_round_trip(*upload_and_read(module))
+    print("✅ app.py round-trip OK")
+
+def test_vercel_app_round_trip():
+    print("2️⃣ Testing typed round-trip through api/index.py...")
+    module = load_module('api_typed_test', os.path.join(ROOT, 'api', 'index.py'), {})
+    check_typed_round_trip(*upload_and_read(module))
+    print("✅ api/index.py round-trip OK")
+
+def test_vercel_failed_upload_keeps_no_rows():
+    print("3️⃣ Testing a failed api/index.py upload leaves no rows...")
+    module = load_module('api_failed_test', os.path.join(ROOT, 'api', 'index.py'), {})
+    client = module.app.test_client()
+    result = client.post('/upload', data={
+        'file': (io.BytesIO(b"a\n1\n2\nx\n"), 'bad.csv'),
+        'schema': json.dumps({'a': 'integer'}),
+    }).get_json()
+
+    assert not result['success']
+    with module.app.app_context():
+        assert module.CSVData.query.count() == 0
+        assert [upload.status for upload in module.CSVUpload.query.all()] == ['failed']
+    print("✅ Failed upload OK")
+
+def test_text_kept_verbatim():
+    print("4️⃣ Testing text cells are stored exactly as uploaded in both apps...")
+    csv_content = b'name,note\n  Alice ,"x "\nBob, y\n'
+    with tempfile.TemporaryDirectory() as tmp:
+        modules = [
+            load_module('app_text_test', os.path.join(ROOT, 'app.py'), {
+                'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'test.db')}",
+                'UPLOAD_FOLDER': tmp,
+            }),
+            load_module('api_text_test', os.path.join(ROOT, 'api', 'index.py'), {}),
+        ]
+        for module in modules:
+            client = module.app.test_client()
+            result = client.post('/upload', data={'file': (io.BytesIO(csv_content), 'text.csv')}).get_json()
+            assert result['success'], result
+            data = client.get(f"/upload/{result['upload_id']}/data").get_json()
+            rows = [row['row_data'] for row in data['data']]
+            assert rows == [{'name': '  Alice ', 'note': 'x '}, {'name': 'Bob', 'note': ' y'}], rows
+    print("✅ Verbatim text OK")
+
+if __name__ == "__main__":
+    try:
+        test_render_app_round_trip()
+        test_vercel_app_round_trip()
+        test_vercel_failed_upload_keeps_no_rows()
+        test_text_kept_verbatim()
+        print("🎉 All ingestion tests passed!")
+    except AssertionError as e:
+        print(f"❌ Ingestion test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Preview test: uploads store their first rows plus a uniform sample, and full data pages in order
+"""
+
+import io
+import os
+import random
+import sys
+import tempfile
+
+from csv_ingest import PREVIEW_HEAD_ROWS, PREVIEW_SAMPLE_ROWS, PreviewSampler
+from test_ingestion import ROOT, load_module
+
+TOTAL_ROWS = 1200
+# Each row holds its own row number, so any returned row can be checked against its position
+PREVIEW_CSV = ("n,label\n" + "".join(f"{n},row{n}\n" for n in range(1, TOTAL_ROWS + 1))).encode()
+
+def load_apps(tmp):
+    return [
+        load_module('app_preview_test', os.path.join(ROOT, 'app.py'), {
+            'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'test.db')}",
+            'UPLOAD_FOLDER': tmp,
+        }),
+        load_module('api_preview_test', os.path.join(ROOT, 'api', 'index.py'), {}),
+    ]
+
+def upload(client):
+    result = client.post('/upload', data={'file': (io.BytesIO(PREVIEW_CSV), 'rows.csv')}).get_json()
+    assert result['success'], result
+    return result['upload_id']
+
+def check_row(row):
+    n = row['row_number']
+    assert row['row_data'] == {'n': n, 'label': f'row{n}'}, row
+
+def test_stored_preview():
+    print("1️⃣ Testing /preview returns the stored head and reservoir sample...")
+    with tempfile.TemporaryDirectory() as tmp:
+        for module in load_apps(tmp):
+            client = module.app.test_client()
+            upload_id = upload(client)
+            preview = client.get(f'/upload/{upload_id}/preview').get_json()
+            assert preview['success'], preview
+
+            assert [row['row_number'] for row in preview['head']] == list(range(1, PREVIEW_HEAD_ROWS + 1))
+            sample_numbers = [row['row_number'] for row in preview['sample']]
+            assert len(sample_numbers) == PREVIEW_SAMPLE_ROWS
+            assert sample_numbers == sorted(set(sample_numbers)), 'sample rows repeat or are unordered'
+            assert 1 <= sample_numbers[0] and sample_numbers[-1] <= TOTAL_ROWS
+            # Not just the first rows again
+            assert sample_numbers[-1] > PREVIEW_SAMPLE_ROWS
+            for row in preview['head'] + preview['sample']:
+                check_row(row)
+    print("✅ Stored preview OK")
+
+def test_reservoir_sample_is_uniform():
+    print("2️⃣ Testing the reservoir sample picks every row with equal probability...")
+    total, size, trials = 100, 10, 4000
+    hits = [0] * (total + 1)
+    for trial in range(trials):
+        sampler = PreviewSampler(head_size=0, sample_size=size)
+        sampler.rng = random.Random(trial)
+        for n in range(1, total + 1):
+            sampler.add(n, '[]')
+        for n, _ in sampler.sample:
+            hits[n] += 1
+
+    # Each row is expected trials * size / total = 400 times; allow for sampling noise
+    expected = trials * size / total
+    assert all(0.75 * expected < count < 1.25 * expected for count in hits[1:]), hits
+    # Early and late rows are equally likely
+    assert abs(sum(hits[1:51]) - sum(hits[51:])) < 0.05 * trials * size
+    print("✅ Reservoir sample OK")
+
+def test_data_paging():
+    print("3️⃣ Testing /data pages with after_row and limit...")
+    with tempfile.TemporaryDirectory() as tmp:
+        for module in load_apps(tmp):
+            client = module.app.test_client()
+            upload_id = upload(client)
+
+            numbers = []
+            after_row = 0
+            while after_row is not None:
+                page = client.get(f'/upload/{upload_id}/data',
+                                  query_string={'after_row': after_row, 'limit': 500}).get_json()
+                assert page['success'], page
+                assert len(page['data']) <= 500
+                for row in page['data']:
+                    check_row(row)
+                numbers.extend(row['row_number'] for row in page['data'])
+                after_row = page['next_after_row']
+            assert numbers == list(range(1, TOTAL_ROWS + 1)), 'pages overlap or skip rows'
+
+            # Page size is capped
+            page = client.get(f'/upload/{upload_id}/data?limit=100000').get_json()
+            assert len(page['data']) == module.DATA_MAX_PAGE_SIZE
+            assert page['next_after_row'] == module.DATA_MAX_PAGE_SIZE
+
+            # Without limit the whole upload comes back, as before paging existed
+            page = client.get(f'/upload/{upload_id}/data').get_json()
+            assert len(page['data']) == TOTAL_ROWS and page['next_after_row'] is None
+    print("✅ Data paging OK")
+
+if __name__ == "__main__":
+    try:
+        test_stored_preview()
+        test_reservoir_sample_is_uniform()
+        test_data_paging()
+        print("🎉 All preview tests passed!")
+    except AssertionError as e:
+        print(f"❌ Preview test failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Uploads list test: cursor pages must cover every upload once, and cached counts must refresh
+"""
+
+import io
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from test_ingestion import ROOT, load_module
+
+def load_apps(tmp):
+    """Both apps, with a count cache that only an upload can refresh"""
+    env = {'UPLOAD_COUNT_CACHE_TTL': '3600'}
+    return [
+        load_module('app_pagination_test', os.path.join(ROOT, 'app.py'), dict(env, **{
+            'DATABASE_URL': f"sqlite:///{os.path.join(tmp, 'test.db')}",
+            'UPLOAD_FOLDER': tmp,
+        })),
+        load_module('api_pagination_test', os.path.join(ROOT, 'api', 'index.py'), env),
+    ]
+
+def add_uploads(module):
+    """Add uploads where several share an upload_date, so pages must break ties on id"""
+    base = datetime(2024, 1, 1)
+    with module.app.app_context():
+        # The Vercel app creates its tables on the first request
+        getattr(module, 'ensure_db_initialized', lambda: None)()
+        module.db.session.add_all([
+            module.CSVUpload(
+                filename=f'file{i}.csv', total_rows=i, upload_date=base + timedelta(hours=i // 3),
+                status='failed' if i % 4 == 0 else 'completed'
+            )
+            for i in range(20)
+        ])
+        module.db.session.commit()
+        uploads = module.CSVUpload.query.order_by(
+            module.CSVUpload.upload_date.desc(), module.CSVUpload.id.desc()
+        ).all()
+        return [(upload.id, upload.status) for upload in uploads]
+
+def page_through(client, **params):
+    """Follow next_cursor until the last page; returns the ids in order"""
+    ids = []
+    cursor = None
+    while True:
+        query = dict(params, **({'cursor': cursor} if cursor else {}))
+        result = client.get('/uploads', query_string=query).get_json()
+        assert result['success'], result
+        ids.extend(upload['id'] for upload in result['uploads'])
+        cursor = result['next_cursor']
+        if cursor is None:
+            return ids
+
+def test_cursor_pages_complete_and_disjoint():
+    print("1️⃣ Testing cursor pages cover every upload exactly once...")
+    with tempfile.TemporaryDirectory() as tmp:
+        for module in load_apps(tmp):
+            expected = add_uploads(module)
+            client = module.app.test_client()
+
+            ids = page_through(client, limit=3)
+            assert ids == [upload_id for upload_id, _ in expected], ids
+
+            failed = page_through(client, limit=2, status='failed')
+            assert failed == [upload_id for upload_id, status in expected if status == 'failed'], failed
+
+            assert client.get('/uploads?cursor=not-a-cursor').status_code == 400
+    print("✅ Cursor pages OK")
+
+def test_count_cache_invalidated_by_upload():
+    print("2️⃣ Testing the cached total refreshes when an upload is added...")
+    with tempfile.TemporaryDirectory() as tmp:
+        for module in load_apps(tmp):
+            add_uploads(module)
+            client = module.app.test_client()
+            assert client.get('/uploads?limit=1').get_json()['total'] == 20
+            assert client.get('/uploads?status=failed').get_json()['total'] == 5
+
+            # Rows added behind the app's back are not counted until the cache expires
+            with module.app.app_context():
+                module.db.session.add(module.CSVUpload(filename='direct.csv', total_rows=0, status='failed'))
+                module.db.session.commit()
+            assert client.get('/uploads?limit=1').get_json()['total'] == 20
+
+            # An upload through the app drops the cached counts
+            result = client.post('/upload', data={'file': (io.BytesIO(b"a\n1\n"), 'new.csv')}).get_json()
+            assert result['success'], result
+            assert client.get('/uploads?limit=1').get_json()['total'] == 22
+            assert client.get('/uploads?status=failed').get_json()['total'] == 6
+    print("✅ Count cache OK")
+
+if __name__ == "__main__":
+    try:
+        test_cursor_pages_complete_and_disjoint()
+        test_count_cache_invalidated_by_upload()
+        print("🎉 All uploads list tests passed!")
+    except AssertionError as e:
+        print(f"❌ Uploads list test failed: {e}")
+        sys.exit(1)